@@ -1,5 +1,6 @@
 ﻿import os
 import json
+import hashlib
 import asyncio
 import logging
 from pathlib import Path
@@ -7,7 +8,7 @@ from urllib.parse import quote
 from typing import Dict, List, Optional
 
 from fastapi import FastAPI, Request, HTTPException, Query
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -180,6 +181,21 @@ def get_file_path(filename: str, user_id: int = None) -> Path:
     return BOOKS_DIR / safe_name
 
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверить If-None-Match: список через запятую, слабые W/ валидаторы и *"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request, user_id: int = Query(None)) -> HTMLResponse:
     pdf_files = list_pdf_files(user_id)
@@ -193,9 +209,19 @@ async def index(request: Request, user_id: int = Query(None)) -> HTMLResponse:
     )
 
 
+@app.get("/sw.js")
+async def service_worker() -> FileResponse:
+    """Service worker отдается из корня, чтобы его scope покрывал всё приложение"""
+    return FileResponse(
+        static_dir / "sw.js",
+        media_type="application/javascript",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 @app.get("/api/books")
-async def api_books(user_id: int = Query(None)) -> JSONResponse:
-    """API endpoint для получения списка книг"""
+async def api_books(request: Request, user_id: int = Query(None)) -> Response:
+    """API endpoint для получения списка книг (с ETag для фоновой ревалидации)"""
     try:
         if user_id:
             # Получаем книги из хранилища Telegram
@@ -208,7 +234,12 @@ async def api_books(user_id: int = Query(None)) -> JSONResponse:
             books = [{"name": f, "file_id": None} for f in pdf_files]
             logger.info(f"Found {len(books)} local books")
         
-        return JSONResponse(content={"books": books})
+        body = json.dumps({"books": books}, ensure_ascii=False, sort_keys=True)
+        etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error getting books for user {user_id}: {e}")
         return JSONResponse(content={"books": []}, status_code=500)
@@ -4,6 +4,25 @@ if (window.Telegram && window.Telegram.WebApp) {
   Telegram.WebApp.ready();
 }
 
+// === Service worker: офлайн-режим и кэш PDF ===
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js').catch((err) => {
+      console.error('Не удалось зарегистрировать service worker:', err);
+    });
+  });
+
+  // Список книг отдается из кэша, а обновленный приходит из фоновой ревалидации
+  navigator.serviceWorker.addEventListener('message', (event) => {
+    if (event.data?.type !== 'books-updated') return;
+    const content = document.getElementById('content');
+    const userId = getUserId();
+    if (content && userId && new URL(event.data.url).searchParams.get('user_id') === String(userId)) {
+      renderBooks(content, userId, event.data.books);
+    }
+  });
+}
+
 // === Получение user_id ===
 function getUserId() {
   const urlParams = new URLSearchParams(window.location.search);
@@ -17,9 +36,44 @@ function getUserId() {
   return null;
 }
 
+// === Отрисовка списка книг ===
+function renderBooks(content, userId, books) {
+  if (books.length === 0) {
+    content.innerHTML = userId ? `
+      <div class="no-books">
+        <h3>📖 У вас пока нет книг</h3>
+        <p>Используйте кнопку <b>📤 Загрузить книгу</b> в боте для добавления PDF файлов.</p>
+        <p><small>Ваш ID: ${userId}</small></p>
+      </div>
+    ` : `
+      <div class="no-books">
+        <h3>🔐 Требуется авторизация</h3>
+        <p>Откройте это приложение через Telegram бота для доступа к вашим книгам.</p>
+      </div>
+    `;
+  } else {
+    content.innerHTML = `
+      <ul class="book-list">
+        ${books.map(book => `
+          <li>
+            <a href="/view/${encodeURIComponent(book.name)}?user_id=${userId}${book.file_id ? '&file_id=' + book.file_id : ''}" class="book-item">
+              📄 ${book.name}
+            </a>
+          </li>
+        `).join('')}
+      </ul>
+      <div style="text-align:center;margin-top:20px;color:#6b7280;font-size:12px;">
+        Ваш ID: ${userId}
+      </div>
+    `;
+  }
+}
+
 // === Загрузка списка книг ===
 async function loadBooks() {
   const content = document.getElementById('content');
+  if (!content) return; // страница без списка книг (например, viewer.html)
+
   try {
     const userId = getUserId();
     let books = [];
@@ -32,35 +86,7 @@ async function loadBooks() {
       }
     }
 
-    if (books.length === 0) {
-      content.innerHTML = userId ? `
-        <div class="no-books">
-          <h3>📖 У вас пока нет книг</h3>
-          <p>Используйте кнопку <b>📤 Загрузить книгу</b> в боте для добавления PDF файлов.</p>
-          <p><small>Ваш ID: ${userId}</small></p>
-        </div>
-      ` : `
-        <div class="no-books">
-          <h3>🔐 Требуется авторизация</h3>
-          <p>Откройте это приложение через Telegram бота для доступа к вашим книгам.</p>
-        </div>
-      `;
-    } else {
-      content.innerHTML = `
-        <ul class="book-list">
-          ${books.map(book => `
-            <li>
-              <a href="/view/${encodeURIComponent(book.name)}?user_id=${userId}${book.file_id ? '&file_id=' + book.file_id : ''}" class="book-item">
-                📄 ${book.name}
-              </a>
-            </li>
-          `).join('')}
-        </ul>
-        <div style="text-align:center;margin-top:20px;color:#6b7280;font-size:12px;">
-          Ваш ID: ${userId}
-        </div>
-      `;
-    }
+    renderBooks(content, userId, books);
   } catch (err) {
     console.error('Ошибка загрузки книг:', err);
     content.innerHTML = `
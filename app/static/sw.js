@@ -0,0 +1,226 @@
+// === Service worker книгридера ===
+// - app shell (simple.html, styles.css, script.js) кэшируется при установке
+// - открытые PDF хранятся в Cache Storage с лимитом по размеру и LRU-вытеснением
+// - список книг отдается из кэша сразу и ревалидируется в фоне по ETag
+
+const VERSION = 'v1';
+const SHELL_CACHE = `tgreader-shell-${VERSION}`;
+const PAGES_CACHE = `tgreader-pages-${VERSION}`;
+const API_CACHE = `tgreader-api-${VERSION}`;
+const PDF_CACHE = `tgreader-pdf-${VERSION}`;
+const PDF_INDEX_URL = '/__pdf-cache-index__';
+
+const PDF_CACHE_BUDGET = 150 * 1024 * 1024; // 150 МБ на все PDF
+// Один файл буферизуется в памяти service worker'а целиком, поэтому для него
+// отдельный, меньший лимит — и большой файл не вытесняет все остальные книги
+const PDF_MAX_FILE_SIZE = 30 * 1024 * 1024; // 30 МБ
+
+const SHELL_URLS = ['/simple', '/static/styles.css', '/static/script.js'];
+
+// === Установка и активация ===
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then((cache) => cache.addAll(SHELL_URLS))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  const current = [SHELL_CACHE, PAGES_CACHE, API_CACHE, PDF_CACHE];
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(
+        keys
+          .filter((key) => key.startsWith('tgreader-') && !current.includes(key))
+          .map((key) => caches.delete(key))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+// === Маршрутизация запросов ===
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (isPdfRequest(url)) {
+    event.respondWith(handlePdf(event, request));
+  } else if (url.pathname === '/api/books') {
+    event.respondWith(handleBooks(event, request));
+  } else if (url.pathname === '/simple' || url.pathname.startsWith('/static/')) {
+    event.respondWith(staleWhileRevalidate(event, request, SHELL_CACHE, url.pathname === '/simple'));
+  } else if (url.pathname.startsWith('/view/')) {
+    event.respondWith(staleWhileRevalidate(event, request, PAGES_CACHE, false));
+  }
+});
+
+function isPdfRequest(url) {
+  return url.pathname.startsWith('/stream/') ||
+    (url.pathname.startsWith('/books/') && url.pathname.toLowerCase().endsWith('.pdf'));
+}
+
+// Кэширование — best-effort: ошибка записи (например, QuotaExceededError)
+// не должна превращать успешный ответ сети в ошибку
+async function safePut(cache, key, response) {
+  try {
+    await cache.put(key, response);
+    return true;
+  } catch (err) {
+    console.error('Не удалось записать ответ в кэш:', err);
+    return false;
+  }
+}
+
+// === App shell и страницы ридера ===
+async function staleWhileRevalidate(event, request, cacheName, ignoreSearch) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(request, { ignoreSearch });
+
+  const network = fetch(request)
+    .then(async (response) => {
+      if (response.ok) {
+        await safePut(cache, ignoreSearch ? new URL(request.url).pathname : request, response.clone());
+      }
+      return response;
+    });
+
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+// === Список книг: из кэша сразу, ревалидация в фоне по ETag ===
+async function handleBooks(event, request) {
+  const cache = await caches.open(API_CACHE);
+  const cached = await cache.match(request);
+
+  if (cached) {
+    event.waitUntil(revalidateBooks(cache, request, cached));
+    return cached;
+  }
+
+  const response = await fetch(request);
+  if (response.ok) await safePut(cache, request, response.clone());
+  return response;
+}
+
+async function revalidateBooks(cache, request, cached) {
+  const headers = new Headers();
+  const etag = cached.headers.get('ETag');
+  if (etag) headers.set('If-None-Match', etag);
+
+  let response;
+  try {
+    response = await fetch(request.url, { headers, cache: 'no-store' });
+  } catch (err) {
+    return; // офлайн — остаемся на закэшированном списке
+  }
+
+  if (response.status === 304 || !response.ok) return;
+  if (etag && response.headers.get('ETag') === etag) return;
+
+  await safePut(cache, request, response.clone());
+  const data = await response.json();
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach((client) => client.postMessage({ type: 'books-updated', url: request.url, books: data.books || [] }));
+}
+
+// === PDF: cache-first с LRU-вытеснением ===
+async function handlePdf(event, request) {
+  const cache = await caches.open(PDF_CACHE);
+  const key = new URL(request.url).href;
+
+  const cached = await cache.match(key);
+  if (cached) {
+    event.waitUntil(touchPdf(key));
+    return cached;
+  }
+
+  const response = await fetch(request);
+  // Частичные ответы (206) и ошибки не кэшируем
+  if (response.status !== 200) return response;
+
+  // Файлы больше лимита не буферизуем вовсе
+  const length = Number(response.headers.get('Content-Length'));
+  if (length > PDF_MAX_FILE_SIZE) return response;
+
+  // Страница получает поток сразу, копия кэшируется в фоне
+  event.waitUntil(cachePdf(cache, key, response.clone()));
+  return response;
+}
+
+async function cachePdf(cache, key, response) {
+  // У /stream/ нет Content-Length, поэтому размер считаем по мере чтения
+  // и прекращаем, как только файл перерос лимит
+  const reader = response.body.getReader();
+  const chunks = [];
+  let size = 0;
+  try {
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      size += value.byteLength;
+      if (size > PDF_MAX_FILE_SIZE) {
+        await reader.cancel();
+        return;
+      }
+      chunks.push(value);
+    }
+  } catch (err) {
+    return; // загрузка оборвалась — неполный файл не кэшируем
+  }
+
+  const headers = new Headers(response.headers);
+  headers.set('Content-Length', String(size));
+  if (await safePut(cache, key, new Response(new Blob(chunks), { status: 200, headers }))) {
+    await recordPdf(key, size);
+  }
+}
+
+// Индекс {url: {size, lastAccess}} хранится в том же кэше отдельной записью.
+// Все изменения индекса выполняются последовательно через цепочку промисов.
+let indexQueue = Promise.resolve();
+
+function updateIndex(mutate) {
+  indexQueue = indexQueue
+    .then(async () => {
+      const cache = await caches.open(PDF_CACHE);
+      const stored = await cache.match(PDF_INDEX_URL);
+      const index = stored ? await stored.json() : {};
+      await mutate(index, cache);
+      await cache.put(PDF_INDEX_URL, new Response(JSON.stringify(index), {
+        headers: { 'Content-Type': 'application/json' },
+      }));
+    })
+    .catch((err) => console.error('Ошибка обновления индекса PDF-кэша:', err));
+  return indexQueue;
+}
+
+function touchPdf(key) {
+  return updateIndex((index) => {
+    if (index[key]) index[key].lastAccess = Date.now();
+  });
+}
+
+function recordPdf(key, size) {
+  return updateIndex(async (index, cache) => {
+    index[key] = { size, lastAccess: Date.now() };
+
+    let total = Object.values(index).reduce((sum, entry) => sum + entry.size, 0);
+    const oldestFirst = Object.keys(index).sort((a, b) => index[a].lastAccess - index[b].lastAccess);
+
+    for (const url of oldestFirst) {
+      if (total <= PDF_CACHE_BUDGET) break;
+      if (url === key) continue;
+      total -= index[url].size;
+      delete index[url];
+      await cache.delete(url);
+    }
+  });
+}
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пула обработки апдейтов на фейковом источнике апдейтов.
+
+Сравнивает последовательную обработку (как polling без задач) с UpdateWorkerPool
+и проверяет, что апдейты каждого пользователя обработаны по порядку, а лимиты
+одновременных обработчиков и ожидающих апдейтов не превышены.
+
+    python bot/bench_workers.py --users 50 --updates 500 --workers 16
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Tuple
+
+from workers import UpdateWorkerPool
+
+
+async def fake_updates(users: int, updates: int, slow_users: int, seed: int) -> AsyncIterator[Tuple[int, int, float]]:
+    """Фейковый источник апдейтов: (user_id, seq, длительность обработки)"""
+    rng = random.Random(seed)
+    seq: Dict[int, int] = defaultdict(int)
+    for _ in range(updates):
+        user_id = rng.randrange(users)
+        # "Медленные" пользователи имитируют долгие запросы к веб-приложению и загрузки
+        delay = rng.uniform(0.2, 0.5) if user_id < slow_users else rng.uniform(0.005, 0.03)
+        yield user_id, seq[user_id], delay
+        seq[user_id] += 1
+        await asyncio.sleep(0)
+
+
+async def handle(log: Dict[int, List[int]], user_id: int, seq: int, delay: float) -> None:
+    await asyncio.sleep(delay)
+    log[user_id].append(seq)
+
+
+def check_order(log: Dict[int, List[int]]) -> bool:
+    return all(seqs == sorted(seqs) for seqs in log.values())
+
+
+async def run_sequential(args) -> Tuple[float, Dict[int, List[int]]]:
+    log: Dict[int, List[int]] = defaultdict(list)
+    started = time.perf_counter()
+    async for user_id, seq, delay in fake_updates(args.users, args.updates, args.slow_users, args.seed):
+        await handle(log, user_id, seq, delay)
+    return time.perf_counter() - started, log
+
+
+async def run_pool(args) -> Tuple[float, Dict[int, List[int]], Dict[str, int]]:
+    log: Dict[int, List[int]] = defaultdict(list)
+    pool = UpdateWorkerPool(
+        max_concurrency=args.workers,
+        max_pending=args.max_pending,
+        max_per_user=args.max_per_user,
+    )
+    started = time.perf_counter()
+    async for user_id, seq, delay in fake_updates(args.users, args.updates, args.slow_users, args.seed):
+        await pool.submit(user_id, lambda u=user_id, s=seq, d=delay: handle(log, u, s, d))
+    await pool.join()
+    return time.perf_counter() - started, log, pool.stats()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--slow-users", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=1000)
+    parser.add_argument("--max-per-user", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    print(f"🧪 {args.updates} апдейтов от {args.users} пользователей ({args.slow_users} медленных)")
+
+    if not args.skip_sequential:
+        elapsed, log = await run_sequential(args)
+        print(f"\nПоследовательно: {elapsed:.2f} с, {args.updates / elapsed:.0f} апд/с, порядок: {'✅' if check_order(log) else '❌'}")
+
+    elapsed, log, stats = await run_pool(args)
+    print(f"\nПул ({args.workers} воркеров): {elapsed:.2f} с, {args.updates / elapsed:.0f} апд/с, порядок: {'✅' if check_order(log) else '❌'}")
+    print(f"   Метрики: {stats}")
+
+    checks = {
+        "порядок апдейтов каждого пользователя": check_order(log),
+        f"одновременных обработчиков ≤ {args.workers}": stats["max_in_flight_seen"] <= args.workers,
+        f"ожидающих апдейтов ≤ {args.max_pending}": stats["max_pending_seen"] <= args.max_pending,
+        f"очередь пользователя ≤ {args.max_per_user}": stats["max_user_depth_seen"] <= args.max_per_user,
+        "все апдейты обработаны": stats["processed"] == args.updates,
+    }
+    print()
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
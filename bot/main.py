@@ -1,13 +1,17 @@
 ﻿import asyncio
+import logging
 import os
 import json
 from pathlib import Path
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import CommandStart
+from aiogram.methods import TelegramMethod
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, WebAppInfo, FSInputFile
 from dotenv import load_dotenv
 import httpx
 
+from workers import UpdateWorkerPool
+
 
 load_dotenv()
 
@@ -15,11 +19,70 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 WEBAPP_URL = os.getenv("WEBAPP_URL", "http://localhost:8000/")
 BOOKS_DIR = Path(os.getenv("BOOKS_DIR", "./books"))
 
+# Параллельная обработка апдейтов: лимит одновременных обработчиков,
+# лимит ожидающих апдейтов (всего и на пользователя; при превышении polling
+# ждет) и период логирования метрик (0 — не логировать)
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "16"))
+BOT_MAX_PENDING = int(os.getenv("BOT_MAX_PENDING", "1000"))
+BOT_MAX_PER_USER = int(os.getenv("BOT_MAX_PER_USER", "20"))
+BOT_STATS_INTERVAL = float(os.getenv("BOT_STATS_INTERVAL", "60"))
+
 # Создаем папку для книг пользователей (для совместимости)
 USER_BOOKS_DIR = BOOKS_DIR / "users"
 USER_BOOKS_DIR.mkdir(parents=True, exist_ok=True)
 
-dp = Dispatcher()
+
+def get_update_key(update: types.Update) -> tuple:
+    """Ключ очереди апдейта: пользователь, иначе чат, иначе сам апдейт"""
+    try:
+        event = update.event
+    except LookupError:
+        return ("update", update.update_id)
+
+    user = getattr(event, "from_user", None)
+    chat = getattr(event, "chat", None)
+    if user:
+        return ("user", user.id)
+    if chat:
+        return ("chat", chat.id)
+    return ("update", update.update_id)
+
+
+class PooledDispatcher(Dispatcher):
+    """Dispatcher, который выполняет feed_update каждого апдейта в пуле.
+
+    Вся цепочка middleware (ошибки, FSM, изоляция событий) и сам обработчик
+    выполняются внутри задачи пула, поэтому апдейты одного пользователя
+    проходят её строго по порядку.
+    """
+
+    def __init__(self, *, update_pool: UpdateWorkerPool, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.update_pool = update_pool
+
+    # Переопределяем приватный Dispatcher._process_update: в aiogram 3.4.1 его
+    # вызывает только _polling. При обновлении aiogram нужно проверить, что
+    # polling по-прежнему идет через этот метод, иначе пул молча обходится.
+    async def _process_update(self, bot: Bot, update: types.Update, call_answer: bool = True, **kwargs) -> bool:
+        return await self.update_pool.submit(
+            get_update_key(update),
+            lambda: self._feed_update_in_pool(bot, update, call_answer, **kwargs),
+        )
+
+    async def _feed_update_in_pool(self, bot: Bot, update: types.Update, call_answer: bool, **kwargs) -> None:
+        """То же, что Dispatcher._process_update, но исключения обработчиков
+        не глотаются, а доходят до пула и учитываются в его метрике failed"""
+        response = await self.feed_update(bot, update, **kwargs)
+        if call_answer and isinstance(response, TelegramMethod):
+            await self.silent_call_request(bot=bot, result=response)
+
+
+update_pool = UpdateWorkerPool(
+    max_concurrency=BOT_WORKERS,
+    max_pending=BOT_MAX_PENDING,
+    max_per_user=BOT_MAX_PER_USER,
+)
+dp = PooledDispatcher(update_pool=update_pool)
 
 
 async def add_file_to_webapp(user_id: int, file_info: dict) -> bool:
@@ -205,7 +268,21 @@ async def main() -> None:
         raise RuntimeError("BOT_TOKEN is not set. Put it into .env or environment.")
 
     bot = Bot(BOT_TOKEN)
-    await dp.start_polling(bot)
+    logging.basicConfig(level=logging.INFO)
+
+    stats_task = None
+    if BOT_STATS_INTERVAL > 0:
+        stats_task = asyncio.create_task(update_pool.report_stats(BOT_STATS_INTERVAL))
+
+    try:
+        # Апдейты уже распределяются пулом, поэтому polling не создает задачи сам.
+        # Сессию бота закрываем сами, после того как пул доработает оставшиеся апдейты.
+        await dp.start_polling(bot, handle_as_tasks=False, close_bot_session=False)
+    finally:
+        await update_pool.join()
+        await bot.session.close()
+        if stats_task:
+            stats_task.cancel()
 
 
 if __name__ == "__main__":
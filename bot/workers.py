@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateWorkerPool:
+    """Пул обработки апдейтов: разные пользователи параллельно, один пользователь — строго по порядку.
+
+    Для каждого ключа (обычно user_id) держится своя очередь и один воркер,
+    который разбирает её последовательно. Общее число одновременно
+    выполняющихся обработчиков ограничено ``max_concurrency``, а общее число
+    ожидающих задач — ``max_pending`` (``submit`` ждёт, пока не освободится место).
+    Очередь одного ключа ограничена ``max_per_user``: ``submit`` для этого ключа
+    так же ждёт, пока его очередь не разгрузится, и ни один апдейт не теряется.
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_pending: int = 1000, max_per_user: int = 20) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        if max_per_user < 1:
+            raise ValueError("max_per_user must be >= 1")
+
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._space = asyncio.Condition()
+        self._queues: Dict[Hashable, Deque[Callable[[], Awaitable]]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+
+        self._pending = 0
+        self._in_flight = 0
+        self._processed = 0
+        self._failed = 0
+        self._max_pending_seen = 0
+        self._max_in_flight_seen = 0
+        self._max_user_depth_seen = 0
+
+    def _has_room(self, key: Hashable) -> bool:
+        queue = self._queues.get(key)
+        user_depth = len(queue) if queue is not None else 0
+        return self._pending < self.max_pending and user_depth < self.max_per_user
+
+    async def submit(self, key: Hashable, job: Callable[[], Awaitable]) -> bool:
+        """Поставить задачу в очередь ключа.
+
+        Ждёт, если переполнен пул или очередь этого ключа. Возвращает True,
+        когда задача поставлена в очередь.
+        """
+        async with self._space:
+            await self._space.wait_for(lambda: self._has_room(key))
+            self._pending += 1
+
+        queue = self._queues.setdefault(key, deque())
+        queue.append(job)
+
+        self._max_pending_seen = max(self._max_pending_seen, self._pending)
+        self._max_user_depth_seen = max(self._max_user_depth_seen, len(queue))
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._drain(key))
+        return True
+
+    async def _drain(self, key: Hashable) -> None:
+        """Последовательно выполнить все задачи из очереди ключа"""
+        queue = self._queues[key]
+        try:
+            while queue:
+                job = queue.popleft()
+                async with self._semaphore:
+                    self._in_flight += 1
+                    self._max_in_flight_seen = max(self._max_in_flight_seen, self._in_flight)
+                    try:
+                        await job()
+                        self._processed += 1
+                    except Exception as e:
+                        self._failed += 1
+                        logger.error(f"Error handling update for {key}: {e}", exc_info=True)
+                    finally:
+                        self._in_flight -= 1
+
+                async with self._space:
+                    self._pending -= 1
+                    self._space.notify_all()
+        finally:
+            del self._workers[key]
+            del self._queues[key]
+
+    async def join(self) -> None:
+        """Дождаться выполнения всех поставленных задач"""
+        while self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Метрики очередей для мониторинга"""
+        depths = [len(q) for q in self._queues.values()]
+        return {
+            "pending": self._pending,
+            "in_flight": self._in_flight,
+            "active_users": len(self._workers),
+            "max_user_depth": max(depths, default=0),
+            "processed": self._processed,
+            "failed": self._failed,
+            "max_pending_seen": self._max_pending_seen,
+            "max_in_flight_seen": self._max_in_flight_seen,
+            "max_user_depth_seen": self._max_user_depth_seen,
+        }
+
+    async def report_stats(self, interval: float) -> None:
+        """Периодически писать метрики пула в лог"""
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(f"Update pool stats: {self.stats()}")
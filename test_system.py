@@ -84,6 +84,32 @@ async def test_api():
         except Exception as e:
             print(f"❌ Ошибка: {e}")
 
+        # Тест 5: Проверяем ETag списка книг (используется service worker'ом)
+        print("\n5. Тестируем ETag и 304 для списка книг")
+        try:
+            response = await client.get(f"{base_url}/api/books?user_id=999999999")
+            assert response.status_code == 200, f"ожидался 200, получен {response.status_code}"
+            etag = response.headers.get("etag")
+            assert etag, "нет заголовка ETag"
+            print(f"✅ Получен ETag: {etag}")
+
+            response = await client.get(
+                f"{base_url}/api/books?user_id=999999999",
+                headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304, f"ожидался 304, получен {response.status_code}"
+            print("✅ Повторный запрос с If-None-Match вернул 304")
+
+            # Прокси (например, ngrok) могут передать слабый валидатор или список
+            response = await client.get(
+                f"{base_url}/api/books?user_id=999999999",
+                headers={"If-None-Match": f'"other", W/{etag}'}
+            )
+            assert response.status_code == 304, f"ожидался 304, получен {response.status_code}"
+            print("✅ Слабый ETag в списке If-None-Match тоже дает 304")
+        except Exception as e:
+            print(f"❌ Ошибка: {e}")
+
 if __name__ == "__main__":
     print("🚀 Запуск тестирования системы потоковой передачи файлов")
     print("=" * 60)